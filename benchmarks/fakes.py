@@ -0,0 +1,132 @@
+"""
+Offline stand-ins for the network backends and synthetic tables used by the benchmarks.
+"""
+
+import json
+import random
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+#===Fake Supabase==========================
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+class _Query:
+    def __init__(self, tables, name):
+        self.tables = tables
+        self.name = name
+        self.payload = None
+
+    def select(self, *columns):
+        return self
+
+    def insert(self, data):
+        self.payload = data
+        return self
+
+    def execute(self):
+        rows = self.tables.setdefault(self.name, [])
+        if self.payload is not None:
+            rows.extend(self.payload if isinstance(self.payload, list) else [self.payload])
+            return _Response(self.payload)
+        return _Response(rows)
+
+class FakeSupabase:
+    """
+    In-memory client answering the 'table().select()/insert().execute()' calls made by the repo.
+    """
+
+    def __init__(self, tables: dict = None):
+        self.tables = tables if tables is not None else {}
+
+    def table(self, name: str):
+        return _Query(self.tables, name)
+
+#===Fake Detection Server==========================
+
+class FakeDetectionServer:
+    """
+    Local HTTP server that answers like the Ultralytics predict API with a fixed grid of boxes.
+    """
+
+    def __init__(self, boxes: int = 50):
+        body = json.dumps({"images": [{"results": [
+            {"box": {"x1": 12 * i, "y1": 10 * i, "x2": 12 * i + 40, "y2": 10 * i + 40}}
+            for i in range(boxes)
+        ]}]}).encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        Handler.protocol_version = "HTTP/1.1"
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+#===Synthetic Tables==========================
+
+DIMENSIONS = ["100x100x6", "100x50x3.2", "75x75x3.2", "150x150x6", "125x75x4.5", "50x50x2.3", "200x100x6", "60x60x3.2"]
+ELEMENTS = ["ridge", "king post", "hip rafter", "valley rafter", "rafter", "stud beam", "tie beam", "columns"]
+FAMILIES = ["SHS - Square Hollow Section", "RHS - Rectangular Hollow Section"]
+
+def make_case_database(rows: int, seed: int = 0) -> list:
+    """
+    Rows shaped like the 'case_database' table, spread over one year of events.
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    data = []
+    for i in range(rows):
+        process = rng.choice(("hauling", "stock", "stock", "usage"))
+        flow = rng.choice(("in", "out")) if process == "stock" else "-"
+        quantity = rng.randint(1, 50)
+        data.append({
+            "id": i,
+            "datetime": (start + timedelta(minutes=rng.randrange(525600))).strftime("%Y-%m-%d %H:%M:%S"),
+            "process": process,
+            "flow": flow,
+            "family": rng.choice(FAMILIES),
+            "dimension": rng.choice(DIMENSIONS),
+            "length": rng.choice((6.0, 12.0)),
+            "quantity": -quantity if flow == "out" else quantity,
+            "element": rng.choice(ELEMENTS) if process == "usage" else "-",
+            "description": "-",
+        })
+    return data
+
+def make_rooflist(rows: int, seed: int = 0) -> list:
+    """
+    Rows shaped like the 'RoofList' planner table.
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            "Element": rng.choice(ELEMENTS),
+            "Dimension": f"{rng.choice(('TUBS', 'TUBR'))} {rng.choice(DIMENSIONS)}",
+            "CutLength": round(rng.uniform(0.5, 12.0), 2),
+        }
+        for _ in range(rows)
+    ]
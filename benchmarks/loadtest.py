@@ -0,0 +1,267 @@
+"""
+Concurrent-session load generator for the compiled supervisor workflow.
+
+N simulated sessions drive 'build_workflow()' at the same time, each mixing text records and image uploads the way
+the Chat page does (the whole message history is sent on every turn). The chat model is replaced by a deterministic
+scripted model and the detection server and Supabase by the fakes in 'benchmarks/fakes.py', so no network is needed.
+Besides latency, the report checks correctness: the checkpointed message count is compared with a serial replay of the
+same sessions, and replies built from another session's messages are counted.
+
+    python -m benchmarks.loadtest --sessions 20 --turns 5
+    python -m benchmarks.loadtest --sessions 20 --shared-thread     # every session on thread_id "1" like app1.py
+"""
+
+import os
+
+# ต้องตั้งค่าก่อน import module ของระบบ
+os.environ["TRACE_PATH"] = ""
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+import io
+import re
+import json
+import time
+import uuid
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from datetime import datetime
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import InMemorySaver
+
+import tools1
+from agents import build_workflow
+from benchmarks.fakes import FakeSupabase, FakeDetectionServer
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+TEXT_RECORDS = [
+    "วันนี้ 1 มี.ค. 2568 08.30 รับเหล็ก SHS 100x100x6 ยาว 6 เมตร เข้าสต็อก 20 ท่อน",
+    "Hauling RHS 100x50x3.2 length 12 m, 15 pieces, today",
+    "Stock out SHS 75x75x3.2 6 m 8 pcs now",
+    "ติดตั้ง จันทัน RHS 100x50x3.2 ยาว 6 เมตร 4 ท่อน วันนี้",
+]
+
+RECORD_ARGS = {
+    "datetime": {"datetime": "now"},
+    "family": {"family": "SHS"},
+    "flow": {"flow": "in"},
+    "dimension": {"dim": "100x100x6"},
+    "length": 6.0,
+    "quantity": 20,
+    "process": {"proc": "stock"},
+    "element": {"roof": "-"},
+    "description": "-",
+}
+
+#===Scripted Chat Model==========================
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Deterministic chat model that plays the supervisor and both agents by looking at its bound tools and the last message.
+    """
+
+    tool_names: list = []
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        names = [getattr(t, "name", None) or getattr(t, "__name__", None) or t.get("name") for t in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _call(self, name, args=None):
+        return AIMessage(content="", tool_calls=[{"name": name, "args": args or {}, "id": f"call_{uuid.uuid4().hex[:12]}"}])
+
+    def _reply(self, messages) -> AIMessage:
+        last = messages[-1]
+        names = set(self.tool_names)
+        last_tool = last.name if isinstance(last, ToolMessage) else None
+        human = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+
+        if "datacollection" in names:
+            if last_tool == "datacollection":
+                return AIMessage(content=f"Recorded: {last.content}")
+            return self._call("datacollection", RECORD_ARGS)
+
+        if "objectdetection" in names:
+            if last_tool in ("objectdetection", "videodetection"):
+                return AIMessage(content=f"Detected: {last.content}")
+            path = re.search(r"Detect image from path: (\S+)", human)
+            return self._call("objectdetection", {"image_path": path.group(1) if path else ""})
+
+        if any(name.startswith("transfer_to_") for name in names):
+            if last_tool and last_tool.startswith("transfer_back"):
+                # บอกว่าคำตอบนี้สร้างจากข้อความของ session ไหนบ้าง เพื่อตรวจว่ามีข้อความของ session อื่นปนมาหรือไม่
+                sessions = sorted({s for m in messages if isinstance(m, HumanMessage) for s in re.findall(r"\[session (\d+)\]", m.content)})
+                return AIMessage(content=f"### Data Recorded Successfully\nContext sessions: {','.join(sessions)}")
+            if "Detect image from path" in human:
+                return self._call("transfer_to_steel_detect_count_agent")
+            return self._call("transfer_to_data_collection_agent")
+
+        return AIMessage(content="-")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+#===Load Generator==========================
+
+def run_session(workflow, session_id: int, args, image_path: str) -> list:
+    thread_id = "1" if args.shared_thread else f"session-{session_id}"
+    config = {"configurable": {"thread_id": thread_id}}
+    messages = []
+    turns = []
+
+    for turn in range(args.turns):
+        is_image = args.image_ratio > 0 and (session_id + turn) % max(round(1 / args.image_ratio), 1) == 0
+        if is_image:
+            messages.append(HumanMessage(content=f"[session {session_id}] stock in | Detect image from path: {image_path}"))
+        else:
+            messages.append(HumanMessage(content=f"[session {session_id}] {TEXT_RECORDS[(session_id + turn) % len(TEXT_RECORDS)]}"))
+
+        start = time.perf_counter()
+        response = workflow.invoke({"messages": messages}, config=config)
+        latency = time.perf_counter() - start
+
+        reply = response["messages"][-1].content
+        context = re.search(r"Context sessions: ([\d,]*)", reply)
+        foreign = set(filter(None, context.group(1).split(","))) - {str(session_id)} if context else set()
+        turns.append({"session": session_id, "kind": "image" if is_image else "text", "latency_s": latency, "cross_session": bool(foreign)})
+
+        messages.append(AIMessage(content=reply))
+    return turns
+
+def checkpoint_messages(workflow, sessions: int, args) -> int:
+    thread_ids = {"1"} if args.shared_thread else {f"session-{i}" for i in range(sessions)}
+    return sum(len(workflow.get_state({"configurable": {"thread_id": t}}).values.get("messages", [])) for t in thread_ids)
+
+def expected_messages(sessions: int, args, image_path: str) -> int:
+    """
+    Messages the checkpointer should hold after the load, found by replaying every session one after another.
+    """
+    workflow = build_workflow(ScriptedChatModel(), checkpointer=InMemorySaver())
+    for i in range(sessions):
+        run_session(workflow, i, args, image_path)
+    return checkpoint_messages(workflow, sessions, args)
+
+def run_load(sessions: int, args, image_path: str, expected: int) -> dict:
+    workflow = build_workflow(ScriptedChatModel(latency=args.llm_latency), checkpointer=InMemorySaver())
+
+    if args.memory:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        futures = [executor.submit(run_session, workflow, i, args, image_path) for i in range(sessions)]
+        turns = [t for f in futures for t in f.result()]
+    wall = time.perf_counter() - start
+
+    growth = None
+    if args.memory:
+        growth = (tracemalloc.get_traced_memory()[0] - before) / sessions
+        tracemalloc.stop()
+
+    latencies = np.array([t["latency_s"] for t in turns])
+    result = {
+        "sessions": sessions,
+        "turns": len(turns),
+        "wall_s": wall,
+        "throughput_turns_per_s": len(turns) / wall,
+        "p50_s": float(np.percentile(latencies, 50)),
+        "p95_s": float(np.percentile(latencies, 95)),
+        "p99_s": float(np.percentile(latencies, 99)),
+        "max_s": float(latencies.max()),
+        "memory_growth_per_session_bytes": growth,
+        "checkpoint_messages": checkpoint_messages(workflow, sessions, args),
+        "checkpoint_messages_expected": expected,
+        "cross_session_turns": sum(t["cross_session"] for t in turns),
+    }
+    for kind in ("text", "image"):
+        kind_latencies = [t["latency_s"] for t in turns if t["kind"] == kind]
+        if kind_latencies:
+            result[f"{kind}_p95_s"] = float(np.percentile(kind_latencies, 95))
+    return result
+
+def print_result(label: str, r: dict):
+    memory = f"{r['memory_growth_per_session_bytes'] / 1024:,.1f} KiB" if r["memory_growth_per_session_bytes"] is not None else "-"
+    print(
+        f"{label:<10} sessions={r['sessions']:<4} turns={r['turns']:<5} "
+        f"throughput={r['throughput_turns_per_s']:8.2f} turns/s  "
+        f"p50={r['p50_s'] * 1e3:8.1f} ms  p95={r['p95_s'] * 1e3:8.1f} ms  p99={r['p99_s'] * 1e3:8.1f} ms  "
+        f"memory/session={memory}  checkpointed messages={r['checkpoint_messages']}/{r['checkpoint_messages_expected']}  "
+        f"cross-session replies={r['cross_session_turns']}"
+    )
+
+def print_problems(r: dict):
+    # throughput ที่ดูปกติไม่ได้แปลว่าถูกต้อง ถ้า turn ที่ทำพร้อมกันเขียนทับกัน หรือเห็นข้อความของ session อื่น
+    missing = r["checkpoint_messages_expected"] - r["checkpoint_messages"]
+    if missing:
+        print(f"WARNING: {missing} of {r['checkpoint_messages_expected']} checkpointed messages were lost to concurrent writes on the same thread")
+    if r["cross_session_turns"]:
+        print(f"WARNING: {r['cross_session_turns']} of {r['turns']} replies were built from another session's messages")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load generator for the supervisor workflow.")
+    parser.add_argument("--sessions", type=int, default=20, help="simulated concurrent sessions")
+    parser.add_argument("--turns", type=int, default=5, help="turns per session")
+    parser.add_argument("--image-ratio", type=float, default=0.25, help="share of turns that upload an image")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds the scripted model sleeps per call")
+    parser.add_argument("--boxes", type=int, default=50, help="boxes returned by the fake detection server")
+    parser.add_argument("--shared-thread", action="store_true", help="put every session on thread_id '1' like app1.py")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip tracemalloc (it slows every turn)")
+    parser.add_argument("--output", default=None, help="result file (default: benchmarks/results/loadtest-<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    client = FakeSupabase()
+    tools1.create_client = lambda *a, **k: client
+
+    image_path = os.path.join(tempfile.mkdtemp(), "sections.jpg")
+    Image.effect_noise((1280, 720), 64).convert("RGB").save(image_path, format="JPEG")
+
+    # datacollection() พิมพ์ข้อความทุกครั้งที่บันทึก จึงปิด stdout ระหว่างยิงโหลด
+    with FakeDetectionServer(boxes=args.boxes) as server, redirect_stdout(io.StringIO()):
+        tools1.YOLO_PREDICT_URL = server.url
+
+        # เล่นทุก session ต่อกันทีละ turn ก่อน เพื่อหาจำนวน message ที่ checkpoint ควรมีเมื่อไม่มีการเขียนทับกัน
+        tools1.create_client = lambda *a, **k: FakeSupabase()
+        expected = {n: expected_messages(n, args, image_path) for n in (1, args.sessions)}
+        tools1.create_client = lambda *a, **k: client
+
+        # ยิงแบบ 1 session ก่อน เพื่อใช้เป็นฐานเทียบการ scale
+        baseline = run_load(1, args, image_path, expected[1])
+        loaded = run_load(args.sessions, args, image_path, expected[args.sessions])
+    efficiency = loaded["throughput_turns_per_s"] / (baseline["throughput_turns_per_s"] * args.sessions)
+
+    print_result("baseline", baseline)
+    print_result("loaded", loaded)
+    print_problems(loaded)
+    print(f"\nScaling efficiency: {efficiency:.0%} of linear ({threading.active_count()} threads alive)")
+    print(f"Records inserted into the fake Supabase: {len(client.tables.get('case_database', []))}")
+
+    output = args.output or os.path.join(RESULTS_DIR, "loadtest-" + datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {"created": datetime.now().isoformat(timespec="seconds"), **{k: v for k, v in vars(args).items() if k != "output"}},
+            "baseline": baseline,
+            "loaded": loaded,
+            "scaling_efficiency": efficiency,
+        }, f, indent=2)
+    print(f"Saved results to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Offline microbenchmarks for the hot paths of the project.
+
+The detection server and Supabase are replaced by the fakes in 'benchmarks/fakes.py', so no network access is needed.
+Results are saved as JSON in 'benchmarks/results/' and can be compared with a previous run:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --only schema detection
+    python -m benchmarks.run --sizes 10000 100000 --compare benchmarks/results/<previous>.json
+"""
+
+import os
+
+# ต้องตั้งค่าก่อน import module ของระบบ
+os.environ["TRACE_PATH"] = ""
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+import io
+import sys
+import json
+import timeit
+import logging
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import supabase
+
+from benchmarks.fakes import FakeSupabase, FakeDetectionServer, make_case_database, make_rooflist
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+CLIENT = FakeSupabase()
+supabase.create_client = lambda *args, **kwargs: CLIENT
+
+DATETIME_INPUTS = [
+    ("iso", "2025-03-01 08:30"),
+    ("slash-dmy", "01/03/2025 08:30"),
+    ("english-short", "1 Mar 2025 08.30"),
+    ("english-comma", "Mar 01, 2025 08:30"),
+    ("thai-short-be", "1 มี.ค. 2568 08.30"),
+    ("thai-long-be", "15 พฤศจิกายน 2568 14:05"),
+    ("now", "now"),
+]
+
+#===Benchmark Groups==========================
+
+def schema_cases(args):
+    from schema import DateTimeForm, FamilyForm, FlowForm, DimForm, ProcessForm, RoofForm
+
+    cases = [
+        (f"DateTimeForm[{label}]", lambda v=value: DateTimeForm(datetime=v))
+        for label, value in DATETIME_INPUTS
+    ]
+
+    def invalid_datetime():
+        try:
+            DateTimeForm(datetime="sometime next week")
+        except ValueError:
+            pass
+
+    cases += [
+        ("DateTimeForm[invalid]", invalid_datetime),
+        ("FamilyForm", lambda: FamilyForm(family="rect 100x50")),
+        ("RoofForm[thai]", lambda: RoofForm(roof="จันทัน")),
+        ("DimForm", lambda: DimForm(dim="100x100x6.5")),
+        ("FlowForm", lambda: FlowForm(flow="OUT")),
+        ("ProcessForm", lambda: ProcessForm(proc="Stock")),
+    ]
+    return cases
+
+def detection_cases(args):
+    import numpy as np
+    from PIL import Image
+    import tools1
+
+    server = FakeDetectionServer(boxes=args.boxes).start()
+    tools1.YOLO_PREDICT_URL = server.url
+
+    image_path = os.path.join(tempfile.mkdtemp(), "sections.jpg")
+    Image.effect_noise((1920, 1080), 64).convert("RGB").save(image_path, format="JPEG")
+    image = Image.open(image_path).convert("RGB")
+
+    rng = np.random.default_rng(0)
+    base = rng.uniform(0, 600, size=(args.boxes, 2))
+    frames = [np.hstack([base + step, base + step + 40]) for step in rng.normal(0, 3, size=(100, 1, 2))]
+
+    def track():
+        tracker = tools1.SectionTracker()
+        for boxes in frames:
+            tracker.update(boxes)
+
+    return [
+        ("objectdetection._encode_image[1080p]", lambda: tools1._encode_image(image)),
+        (f"objectdetection._predict[1080p,boxes={args.boxes}]", lambda: tools1._predict(image)),
+        (f"objectdetection[1080p,boxes={args.boxes}]", lambda: tools1.objectdetection(image_path)),
+        (f"SectionTracker.update[frames=100,boxes={args.boxes}]", track),
+    ]
+
+def datacollection_cases(args):
+    import tools1
+    from schema import DateTimeForm, FamilyForm, FlowForm, DimForm, ProcessForm, RoofForm
+
+    tools1.create_client = lambda *a, **k: FakeSupabase()
+    record = dict(
+        datetime=DateTimeForm(datetime="1 มี.ค. 2568 08.30"),
+        family=FamilyForm(family="SHS"),
+        flow=FlowForm(flow="in"),
+        dimension=DimForm(dim="100x100x6"),
+        length=6.0,
+        quantity=20,
+        process=ProcessForm(proc="stock"),
+        element=RoofForm(roof="-"),
+        description="-",
+    )
+
+    def collect():
+        with redirect_stdout(io.StringIO()):
+            tools1.datacollection(**record)
+
+    return [("datacollection", collect)]
+
+PANELS = ["hauling_panel", "stock_panel", "usage_length_panel", "element_progress_panel"]
+
+def dashboard_cases(args):
+    import st_visiualization
+
+    # streamlit เตือน missing ScriptRunContext และบอกวิธีเปิดแอปทุกครั้งที่เรียกนอก 'streamlit run'
+    # ปิดเฉพาะ logger เหล่านี้ ส่วน warning อื่น (เช่น FutureWarning ของ pandas) ยังแสดงตามปกติ
+    for name in ("streamlit", "streamlit.runtime.scriptrunner_utils.script_run_context", "streamlit.deprecation_util"):
+        logging.getLogger(name).disabled = True
+
+    cases = []
+    for rows in args.sizes:
+        tables = {
+            "case_database": make_case_database(rows),
+            "RoofList": make_rooflist(max(rows // 10, 1)),
+        }
+
+        def load(tables=tables):
+            CLIENT.tables = tables
+            return st_visiualization.load_data()
+
+        def rooflist(tables=tables):
+            CLIENT.tables = tables
+            return st_visiualization.load_rooflist()
+
+        df, df_rooflist = load(), rooflist()
+        date_range = (df["datetime"].min().date(), df["datetime"].max().date())
+
+        def charts(tables=tables):
+            # วัดการแสดงผลทุก panel แบบ cache ว่าง (fragment ไม่ทำงานนอก 'streamlit run' จึงเรียกฟังก์ชันข้างในตรง ๆ)
+            CLIENT.tables = tables
+            st_visiualization.case_data.clear()
+            st_visiualization.rooflist_data.clear()
+            for panel in PANELS:
+                getattr(st_visiualization, panel).__wrapped__()
+
+        cases += [
+            (f"load_data[rows={rows}]", load),
+            (f"load_rooflist[rows={len(df_rooflist)}]", rooflist),
+            (f"hauling_summary[rows={rows}]", lambda df=df, r=date_range: st_visiualization.hauling_summary(df, r)),
+            (f"stock_net_flow[rows={rows}]", lambda df=df: st_visiualization.stock_net_flow(df)),
+            (f"length_usage[rows={rows}]", lambda df=df, p=df_rooflist: st_visiualization.length_usage(df, p)),
+            (f"element_progress[rows={rows}]", lambda df=df, p=df_rooflist: st_visiualization.element_progress(df, p)),
+            (f"show_charts[rows={rows}]", charts),
+        ]
+    return cases
+
+GROUPS = {
+    "schema": schema_cases,
+    "detection": detection_cases,
+    "datacollection": datacollection_cases,
+    "dashboard": dashboard_cases,
+}
+
+#===Runner==========================
+
+def measure(func, repeat: int) -> dict:
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    times = [t / loops for t in timer.repeat(repeat=repeat, number=loops)]
+    return {"loops": loops, "repeat": repeat, "best_s": min(times), "median_s": statistics.median(times)}
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "-"
+
+def compare(results: list, previous_path: str, threshold: float):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {r["name"]: r for r in json.load(f)["results"]}
+
+    print(f"\nCompared with {previous_path}")
+    for r in results:
+        old = previous.get(r["name"])
+        if old is None:
+            continue
+        ratio = r["median_s"] / old["median_s"]
+        flag = "SLOWER" if ratio > 1 + threshold else ("faster" if ratio < 1 - threshold else "")
+        print(f"{r['name']:<55} {old['median_s'] * 1e3:>12.3f} ms -> {r['median_s'] * 1e3:>12.3f} ms  x{ratio:5.2f}  {flag}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline microbenchmarks for the CMM system.")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS), help="benchmark groups to run")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000], help="row counts of the synthetic tables")
+    parser.add_argument("--boxes", type=int, default=50, help="boxes returned by the fake detection server")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="previous result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = []
+    for group in args.only:
+        for name, func in GROUPS[group](args):
+            result = {"group": group, "name": name, **measure(func, args.repeat)}
+            results.append(result)
+            print(f"{name:<55} {result['median_s'] * 1e3:>12.3f} ms  (best {result['best_s'] * 1e3:.3f} ms, {result['loops']} loops)")
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "commit": _git_commit(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "sizes": args.sizes,
+                "boxes": args.boxes,
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        compare(results, args.compare, args.threshold)
+
+if __name__ == "__main__":
+    main()
@@ -31,7 +31,7 @@ class DateTimeForm(BaseModel):
 
         # Replace Thai month to English
         for th, en in thai_months.items():
-            value = re.sub(th, en, value)
+            value = value.replace(th, en)
 
         # Replace '.' with ':' in time
         value = re.sub(r'(\d{1,2})\.(\d{2})', r'\1:\2', value)
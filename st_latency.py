@@ -0,0 +1,71 @@
+import os
+import pandas as pd
+import streamlit as st
+import altair as alt
+
+from tracing import TRACE_PATH
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _read_spans(path: str, mtime_ns: int, size: int) -> pd.DataFrame:
+    # mtime และขนาดไฟล์เป็นส่วนหนึ่งของ key จึงอ่านไฟล์ใหม่เฉพาะเมื่อมี span ถูกเขียนเพิ่ม
+    return pd.read_json(path, lines=True)
+
+def load_spans(path: str = TRACE_PATH) -> pd.DataFrame:
+    # อ่าน span จากไฟล์ที่ถูกหมุนออกไปแล้วหนึ่งไฟล์ และไฟล์ปัจจุบัน
+    paths = [p for p in (f"{path}.1", path) if path and os.path.exists(p)]
+    frames = [_read_spans(p, os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in paths]
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame(columns=["traceId", "parentSpanId", "name", "durationMs", "status", "attributes"])
+    return pd.concat(frames, ignore_index=True)
+
+def show_latency(df: pd.DataFrame):
+    if df.empty:
+        st.info("No spans recorded yet. Send a message on the Chat page to collect traces.")
+        return
+
+    # refresh อัตโนมัติของ dashboard ไม่ได้เกิดจากผู้ใช้ จึงตัดทั้ง trace ออกจาก percentile เว้นแต่จะเลือกให้รวมไว้
+    attributes = pd.json_normalize(df["attributes"].tolist())
+    if "trigger" in attributes.columns:
+        auto = df["traceId"].isin(df.loc[(attributes["trigger"] == "auto").to_numpy(), "traceId"]).to_numpy()
+        if auto.any() and not st.checkbox(f"Include background dashboard refreshes ({auto.sum():,} spans)", key="latency_include_auto"):
+            df, attributes = df[~auto].reset_index(drop=True), attributes[~auto].reset_index(drop=True)
+            if df.empty:
+                st.info("Only background dashboard refreshes are recorded so far.")
+                return
+
+    # แยก stage ตาม agent ที่เป็นเจ้าของ เพื่อให้ LLM ของ supervisor กับ ReAct loop ของแต่ละ agent ไม่ปนกัน
+    attributes["agent"] = attributes["agent"].fillna("-") if "agent" in attributes.columns else "-"
+    attributes["name"] = df["name"].values
+    df = df.assign(agent=attributes["agent"].values)
+    keys = ["agent", "name"]
+
+    # คำนวณ p50/p95/p99 ต่อ stage
+    stats = df.groupby(keys)["durationMs"].describe(percentiles=[0.5, 0.95, 0.99])
+    stats = stats.rename(columns={"50%": "p50", "95%": "p95", "99%": "p99"})[["count", "p50", "p95", "p99", "max"]]
+    stats["errors"] = df[df["status"] == "ERROR"].groupby(keys).size().reindex(stats.index, fill_value=0)
+
+    # รวม token และขนาด payload จาก attributes
+    totals = [c for c in ("input_tokens", "output_tokens", "payload_bytes", "response_bytes") if c in attributes.columns]
+    if totals:
+        stats = stats.join(attributes.groupby(keys)[totals].mean().add_prefix("avg "))
+
+    stats = stats.sort_values("p95", ascending=False)
+
+    with st.container(border=True):
+        st.markdown("##### **Latency per Stage (ms.)**")
+        st.dataframe(stats.style.format("{:,.1f}"))
+
+    chart_df = stats.reset_index()
+    chart_df["stage"] = (chart_df["agent"] + " / " + chart_df["name"]).str.removeprefix("- / ")
+    chart_df = chart_df.melt(id_vars=["stage", "agent", "name"], value_vars=["p50", "p95", "p99"], var_name="percentile", value_name="ms")
+    chart = alt.Chart(chart_df).mark_bar().encode(
+        x=alt.X("ms:Q", title="Latency (ms.)"),
+        y=alt.Y("stage:N", title="Stage", sort=chart_df["stage"].drop_duplicates().tolist()),
+        yOffset="percentile:N",
+        color=alt.Color("percentile:N", title="Percentile"),
+        tooltip=["agent:N", "name:N", "percentile:N", alt.Tooltip("ms:Q", format=",.1f")],
+    ).properties(
+        title="Latency Percentiles"
+    )
+    st.altair_chart(chart, use_container_width=True)
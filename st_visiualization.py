@@ -1,9 +1,12 @@
+import functools
+import numpy as np
 import pandas as pd
 import streamlit as st
 import altair as alt
 from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
+from tracing import span
 
 load_dotenv()
 
@@ -12,234 +15,404 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def load_data():
-    # ดึงข้อมูลจาก Supabase
-    response = supabase.table("case_database").select("*").execute()
-    df = pd.DataFrame(response.data)
-
-    df["datetime"] = pd.to_datetime(df["datetime"])
-    df["flow"] = df["flow"].fillna("-").str.strip().str.lower()
-    df["process"] = df["process"].fillna("-").str.strip().str.lower()
-    df["dimension"] = df["dimension"].fillna("-")
-    df["family"] = df["family"].fillna("-")
-
-    return df
+# schema คงที่ของแต่ละตาราง: คอลัมน์ข้อความที่มีค่าซ้ำกันมากเก็บเป็น category ตัวเลขเก็บเป็น float/int
+# ข้อความอิสระเก็บเป็น Arrow string (pyarrow มากับ streamlit อยู่แล้ว) แทน Python object
+CASE_SCHEMA = {
+    "datetime": "datetime64[ns]",
+    "process": "category",
+    "flow": "category",
+    "family": "category",
+    "dimension": "category",
+    "length": "float64",
+    "quantity": "int64",
+    "element": "category",
+    "description": "string[pyarrow]",
+}
+
+ROOFLIST_SCHEMA = {
+    "element": "category",
+    "dimension": "category",
+    "cutlength": "float64",
+}
+
+# คอลัมน์ที่ต้องแปลงเป็นตัวพิมพ์เล็กก่อนเปรียบเทียบ
+LOWERCASE_COLUMNS = {"process", "flow"}
+
+def _clean_categories(series: pd.Series, clean) -> pd.Categorical:
+    """
+    Apply 'clean' to the distinct values only, then map the row codes onto the cleaned categories.
+    """
+    cleaned = clean(series.cat.categories.astype(str))
+    categories = pd.Index(cleaned.unique())
+    codes = categories.get_indexer(cleaned)[series.cat.codes.to_numpy()]
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+def _to_category(series: pd.Series, lower: bool = False) -> pd.Categorical:
+    raw = series.fillna("-").astype("category")
+    if lower:
+        return _clean_categories(raw, lambda c: c.str.strip().str.lower())
+    return _clean_categories(raw, lambda c: c.str.strip())
+
+def _typed_frame(rows: list, schema: dict) -> pd.DataFrame:
+    # แปลงทีละคอลัมน์ตาม schema คอลัมน์ที่ไม่มีในข้อมูลจะเป็นค่าว่าง
+    raw = pd.DataFrame(rows).reindex(columns=list(schema))
+    columns = {}
+    for column, dtype in schema.items():
+        values = raw[column]
+        if dtype == "category":
+            columns[column] = _to_category(values, lower=column in LOWERCASE_COLUMNS)
+        elif dtype == "datetime64[ns]":
+            columns[column] = pd.to_datetime(values, format="ISO8601")
+        elif dtype.startswith("string"):
+            columns[column] = values.fillna("-").astype(dtype)
+        else:
+            columns[column] = pd.to_numeric(values).fillna(0).astype(dtype)
+    return pd.DataFrame(columns)
 
-def show_charts(df: pd.DataFrame):
-    # กรองข้อมูลตาม process
-    df_hauling = df[df["process"] == "hauling"]
+def load_data() -> pd.DataFrame:
+    # ดึงข้อมูลจาก Supabase
+    with span("supabase.select", table="case_database") as s:
+        response = supabase.table("case_database").select("*").execute()
+        s.set(rows=len(response.data))
+
+    return _typed_frame(response.data, CASE_SCHEMA)
+
+def load_rooflist() -> pd.DataFrame:
+    # โหลด RoofList และเตรียมข้อมูล
+    with span("supabase.select", table="RoofList") as s:
+        response = supabase.table("RoofList").select("*").execute()
+        s.set(rows=len(response.data))
+
+    # ชื่อคอลัมน์ใน RoofList ไม่ได้เป็นตัวพิมพ์เล็กเสมอไป
+    rows = [{k.strip().lower(): v for k, v in row.items()} for row in response.data]
+    df_rooflist = _typed_frame(rows, ROOFLIST_SCHEMA)
+
+    # ลบคำว่า TUBR / TUBS ออกจาก dimension (ทำครั้งเดียวบน category)
+    df_rooflist["dimension"] = _clean_categories(
+        df_rooflist["dimension"],
+        lambda c: c.str.replace("TUBR", "", case=False, regex=False).str.replace("TUBS", "", case=False, regex=False).str.strip(),
+    )
+
+    return df_rooflist
+
+# อายุ cache ของข้อมูลแต่ละตาราง (วินาที) RoofList เป็นแผนงานจึงเปลี่ยนไม่บ่อย
+CASE_DATA_TTL = 30
+ROOFLIST_TTL = 600
+
+# ทุก panel ใช้ DataFrame ชุดเดียวกันแบบอ่านอย่างเดียว จึงใช้ cache_resource เพื่อไม่ต้อง copy ทุกครั้งที่อ่าน
+case_data = st.cache_resource(ttl=CASE_DATA_TTL, show_spinner=False)(load_data)
+rooflist_data = st.cache_resource(ttl=ROOFLIST_TTL, show_spinner=False)(load_rooflist)
+
+# จำนวนจุดสูงสุดที่ส่งไปวาดกราฟเส้น ไม่ว่าประวัติจะยาวแค่ไหน
+MAX_CHART_POINTS = 1500
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: return the indices of 'threshold' points that keep the visual shape of the series, peaks included.
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        # งบไม่พอสำหรับ bucket จึงเก็บแค่จุดแรกและจุดสุดท้าย (หรือจุดสุดท้ายอย่างเดียว)
+        return np.array([0, n - 1])[2 - max(threshold, 0):]
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # จุดอ้างอิงคือค่าเฉลี่ยของ bucket ถัดไป (bucket สุดท้ายใช้จุดสุดท้าย)
+        if i + 2 < len(edges):
+            avg_x, avg_y = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+
+    return keep
+
+def downsample(df: pd.DataFrame, x: str, y: str, by: str, max_points: int = MAX_CHART_POINTS) -> pd.DataFrame:
+    """
+    Reduce each 'by' series with LTTB so the whole chart stays under 'max_points'.
+    A narrower date range leaves fewer points to reduce, so the resolution follows the selected range.
+    With more series than the budget allows, each series keeps only its first and last point, or only its last one,
+    and past 'max_points' series only the most recently updated series are kept.
+    """
+    groups = df[by].nunique()
+    if len(df) <= max_points or groups == 0:
+        return df
+
+    threshold = max_points // groups
+    if threshold == 0:
+        # series มากกว่างบจุด จึงเก็บเฉพาะจุดล่าสุดของ series ที่เคลื่อนไหวล่าสุด
+        return df.sort_values(x).groupby(by, observed=True).tail(1).tail(max_points).reset_index(drop=True)
+    parts = []
+    for _, part in df.sort_values(x).groupby(by, sort=False, observed=True):
+        seconds = (part[x] - part[x].iloc[0]).dt.total_seconds().to_numpy()
+        parts.append(part.iloc[lttb(seconds, part[y].to_numpy(dtype=float), threshold)])
+    return pd.concat(parts, ignore_index=True)
+
+def _range_bounds(series: pd.Series, date_range) -> tuple:
+    # date_input คืนค่าแค่วันเริ่มต้นระหว่างที่ผู้ใช้กำลังเลือกช่วง
+    start = pd.Timestamp(date_range[0])
+    end = pd.Timestamp(date_range[-1]) + pd.Timedelta(days=1)
+    if series.dt.tz is not None:
+        start, end = start.tz_localize(series.dt.tz), end.tz_localize(series.dt.tz)
+    return start, end
+
+def in_date_range(series: pd.Series, date_range) -> pd.Series:
+    start, end = _range_bounds(series, date_range)
+    return (series >= start) & (series < end)
+
+def date_range_input(df: pd.DataFrame, key: str):
+    # เลือกช่วงเวลาที่จะแสดงในกราฟ
+    first, last = df["datetime"].min().date(), df["datetime"].max().date()
+    return st.date_input("Date range", value=(first, last), min_value=first, max_value=last, key=key)
+
+#===Aggregations==========================
+
+def hauling_summary(df: pd.DataFrame, date_range) -> pd.DataFrame:
+    df_hauling = df[(df["process"] == "hauling") & in_date_range(df["datetime"], date_range)]
+    with span("charts.hauling", rows=len(df_hauling)):
+        return df_hauling.groupby("dimension", as_index=False, observed=True)["quantity"].sum()
+
+def stock_net_flow(df: pd.DataFrame) -> pd.DataFrame:
     df_stock = df[df["process"] == "stock"]
-    #df_usage = df[(df["process"] == "usage") & (df["element"].notna())]
-
-    with st.expander("**🚛 Hauling Process**",expanded=True):
-        
-        hauling_group = df_hauling.groupby("dimension", as_index=False)["quantity"].sum()
-        barchart = alt.Chart(hauling_group).mark_bar().encode(
-            x=alt.X("quantity:Q", title="Quantity"),
-            y=alt.Y("dimension:N", title="Dimension", sort='-x'),
-            tooltip=["dimension", "quantity"]
-        ).properties(
-            title="Hauling Flow"
+    with span("charts.stock", rows=len(df_stock)):
+        # net สะสม = in สะสม + out สะสม (out เป็นค่าติดลบอยู่แล้ว) คำนวณทุก dimension ใน groupby เดียว
+        df_flow = df_stock[df_stock["flow"].isin(["in", "out"])]
+        net = (
+            df_flow.groupby(["dimension", "datetime"], observed=True)["quantity"].sum()
+            .groupby(level="dimension", observed=True).cumsum()
+            .rename("net")
         )
-        st.altair_chart(barchart, use_container_width=True)
-
-    with st.expander("**📦 Stock Process**", expanded=True):
-        # แปลง datetime
-        df_stock["datetime"] = pd.to_datetime(df_stock["datetime"])
-
-        # เตรียม DataFrame สำหรับรวมผลทุก dimension
-        df_all = []
-
-        for dim in df_stock["dimension"].dropna().unique():
-            df_dim = df_stock[df_stock["dimension"] == dim].copy()
-
-            # คำนวณ cumulative in/out
-            df_in = df_dim[df_dim["flow"] == "in"].groupby("datetime")["quantity"].sum().cumsum().rename("in_cum")
-            df_out = df_dim[df_dim["flow"] == "out"].groupby("datetime")["quantity"].sum().cumsum().rename("out_cum")
-
-            # รวมข้อมูล
-            df_merge = pd.concat([df_in, df_out], axis=1).fillna(method="ffill").fillna(0)
-            df_merge["net"] = df_merge["in_cum"] + df_merge["out_cum"]
-            df_merge = df_merge.reset_index()
-            df_merge["dimension"] = dim
-
-            df_all.append(df_merge[["datetime", "dimension", "net"]])
-
-        # รวมทุก dimension
-        df_final = pd.concat(df_all, ignore_index=True)
-
-        # แบ่งเป็น 2 คอลัมน์: col1 = กราฟ, col2 = metric
-        col1, col2 = st.columns([3, 1])
-
-        with col1.container(border=True):
-            chart = alt.Chart(df_final).mark_line().encode(
-                x=alt.X("datetime:T", title="Datetime"),
-                y=alt.Y("net:Q", title="Net Quantity", scale=alt.Scale(zero=True)),
-                color=alt.Color("dimension:N", title="Dimension"),
-                tooltip=[
-                    alt.Tooltip("datetime:T", title="Datetime", format="%Y-%m-%d %H:%M:%S"),
-                    alt.Tooltip("dimension:N", title="Dimension"),
-                    alt.Tooltip("net:Q", title="Net Quantity"),
-                ]
-            ).properties(
-                title="Net Quantity Flow"
-            )
-            st.altair_chart(chart, use_container_width=True)
-
-        with col2:
-            st.markdown("**Net Quantity by Dimension**")
-            latest_nets = df_final.sort_values("datetime").groupby("dimension").tail(1)
-
-            for _, row in latest_nets.iterrows():
-                dim = row["dimension"]
-                net = int(row["net"])
-                st.metric(label=f"Dimension **:green-background[{dim}]** mm.", value=f"{net:,} ea.", border=True)
-
-    with st.expander("**🏗️ Construction Usage Process**", expanded=True):
-        # โหลด RoofList และเตรียมข้อมูล
-        response_rooflist = supabase.table("RoofList").select("*").execute()
-        df_rooflist = pd.DataFrame(response_rooflist.data)
-        df_rooflist.columns = df_rooflist.columns.str.strip().str.lower()
-
+        return net.reset_index()
+
+def net_in_range(df_net: pd.DataFrame, date_range) -> pd.DataFrame:
+    """
+    Cut the cumulative net to the date range. Each dimension is carried across both edges of the range with its last
+    net value, so a dimension without stock events inside the range still shows as a flat line.
+    """
+    start, end = _range_bounds(df_net["datetime"], date_range)
+    before, inside = df_net["datetime"] < start, (df_net["datetime"] >= start) & (df_net["datetime"] < end)
+
+    seed = df_net[before].groupby("dimension", observed=True).tail(1).assign(datetime=start)
+    carry = df_net[before | inside].groupby("dimension", observed=True).tail(1).assign(datetime=end - pd.Timedelta(seconds=1))
+
+    parts = [part for part in (seed, df_net[inside], carry) if len(part)]
+    if not parts:
+        return df_net[inside]
+    df_range = pd.concat(parts, ignore_index=True).sort_values("datetime", kind="stable")
+    return df_range.drop_duplicates(["dimension", "datetime"], keep="last").reset_index(drop=True)
+
+def length_usage(df: pd.DataFrame, df_rooflist: pd.DataFrame) -> pd.DataFrame:
+    # กรองข้อมูลสำหรับ stock_out (process='stock' and flow='out') และ usage (process='usage')
+    df_stock_out_data = df[(df["process"] == "stock") & (df["flow"] == "out")]
+    df_usage_data = df[df["process"] == "usage"]
+
+    with span("charts.usage_length", rows=len(df), planned_rows=len(df_rooflist)):
+        # ความยาวรวม = length x quantity คิดเป็น Series โดยไม่ copy DataFrame
+        stock_out_length = -(df_stock_out_data["length"] * df_stock_out_data["quantity"])
+        usage_length = df_usage_data["length"] * df_usage_data["quantity"]
+
+        result_frames = [
+            stock_out_length.groupby(df_stock_out_data["dimension"], observed=True).sum().rename("Stock Out"),
+            usage_length.groupby(df_usage_data["dimension"], observed=True).sum().rename("Usage"),
+            df_rooflist.groupby("dimension", observed=True)["cutlength"].sum().rename("RoofList"),
+        ]
+
+        # รวมผลทั้งหมดเข้าด้วยกัน แล้วเรียงแถวตามที่ต้องการแสดง
+        df_combined = pd.concat(result_frames, axis=1).fillna(0)
+        return df_combined.T.loc[["RoofList", "Stock Out", "Usage"]]
+
+def element_progress(df: pd.DataFrame, df_rooflist: pd.DataFrame) -> pd.DataFrame:
+    with span("charts.element_progress", rows=len(df), planned_rows=len(df_rooflist)):
         # คำนวณจำนวนที่วางแผนไว้
-        planned = df_rooflist.groupby("element", as_index=False).size().rename(columns={"size": "planned_quantity"})
+        planned = df_rooflist.groupby("element", as_index=False, observed=True).size().rename(columns={"size": "planned_quantity"})
 
         # คำนวณจำนวนที่ติดตั้งแล้ว
-        installed = df[df["process"] == "usage"].groupby("element", as_index=False)["quantity"].sum().rename(columns={"quantity": "installed_quantity"})
-
-        # กรองข้อมูลสำหรับ stock_out (process='stock' and flow='out')
-        df_stock_out_data = df[(df["process"] == "stock") & (df["flow"] == "out")]
-
-        # กรองข้อมูลสำหรับ usage (process='usage')
         df_usage_data = df[df["process"] == "usage"]
-
-        has_length_stock_out = "length" in df_stock_out_data.columns
-        has_length_usage = "length" in df_usage_data.columns
-        has_length_RoofList = "cutlength" in df_rooflist.columns
-
-        if has_length_stock_out or has_length_usage or has_length_RoofList:
-            st.markdown("##### **Length usage by Dimension (m.)**")
-
-            result_frames = []
-
-            if has_length_stock_out:
-                df_stock_out_data_calc = df_stock_out_data.copy()
-                if "quantity" in df_stock_out_data_calc.columns:
-                    df_stock_out_data_calc["calculated_total_length"] = -(df_stock_out_data_calc["length"] * df_stock_out_data_calc["quantity"])
-                    df_stock_out_sum = df_stock_out_data_calc.groupby("dimension")["calculated_total_length"].sum().rename("Stock Out").to_frame()
-                    result_frames.append(df_stock_out_sum)
-
-            if has_length_usage:
-                df_usage_data_calc = df_usage_data.copy()
-                if "quantity" in df_usage_data_calc.columns:
-                    df_usage_data_calc["calculated_total_length"] = df_usage_data_calc["length"] * df_usage_data_calc["quantity"]
-                    df_usage_sum = df_usage_data_calc.groupby("dimension")["calculated_total_length"].sum().rename("Usage").to_frame()
-                    result_frames.append(df_usage_sum)
-
-            if has_length_RoofList:
-                              
-                # ลบคำว่า RHS / SHS ออกด้วย str.replace
-                df_rooflist_clean = df_rooflist.copy()
-                df_rooflist_clean["dimension"] = df_rooflist_clean["dimension"].str.replace("TUBR", "", case=False, regex=False)
-                df_rooflist_clean["dimension"] = df_rooflist_clean["dimension"].str.replace("TUBS", "", case=False, regex=False)
-                df_rooflist_clean["dimension"] = df_rooflist_clean["dimension"].str.strip()
-
-                # รวมความยาวโดย dimension ที่ล้างแล้ว
-                df_rooflist_sum = df_rooflist_clean.groupby("dimension")["cutlength"].sum().rename("RoofList").to_frame()
-                result_frames.append(df_rooflist_sum)
-
-            # รวมผลทั้งหมดเข้าด้วยกัน
-            if result_frames:
-                df_combined = pd.concat(result_frames, axis=1).fillna(0)
-
-                # ลำดับแถวที่ต้องการแสดง
-                desired_order = ["RoofList", "Stock Out", "Usage"]
-
-                # Transpose + เปลี่ยนชื่อแถวให้อ่านง่าย
-                df_final = df_combined.T.loc[desired_order]
-                df_final.rename(index={
-                    "Stock Out": "⬇️ Length of steel from Stock Out",
-                    "Usage": "🏗️ Length of steel from Installed",
-                    "RoofList": "📋 Length of steel from Planner"
-                }, inplace=True)
-
-                # แสดงตาราง
-                st.dataframe(df_final.style.format("{:,.2f}"))
-
-                for col in df_final.columns:
-                    try:
-                        val_planner = df_final.loc["📋 Length of steel from Planner", col]
-                    except:
-                        val_planner = 0
-
-                    try:
-                        val_stockout = df_final.loc["⬇️ Length of steel from Stock Out", col]
-                    except:
-                        val_stockout = 0
-
-                    try:
-                        val_usage = df_final.loc["🏗️ Length of steel from Installed", col]
-                    except:
-                        val_usage = 0
-
-                    # คำนวณ % เทียบ planner และ stock out
-                    progress_rooflist = min(val_usage / val_planner, 1.0) if val_planner > 0 else 0.0
-                    lre_u_pl = val_planner - val_usage
-
-                    progress_stockout = min(val_usage / abs(val_stockout), 1.0) if val_stockout != 0 else 0.0
-                    lre_so_u = val_stockout - val_usage
-
-                    st.markdown(f"**:green-background[Steel Dimension {col} mm.]**")
-
-                    #with col1:
-                    #    textcol1 = f"Steel Installed: **{val_usage:.2f} m.** | Remaining: **{lre_u_pl:.2f} m.**"
-                    #    st.progress(progress_rooflist, text=textcol1)
-
-                    textcol2 = f"Steel Used: **{val_usage:.2f} m.** | Remaining: **{lre_so_u:.2f} m.**"
-                    st.progress(progress_stockout, text=textcol2)
-                
-        else:
-            st.warning("The 'length' column is not available in the data for 'stock out' or 'usage' processes.")
-
-        st.divider() # เพิ่มเส้นแบ่งเพื่อความสวยงาม
-        
-        st.markdown("##### **Steel Usage by Structural Element**")
+        installed = df_usage_data.groupby("element", as_index=False, observed=True)["quantity"].sum().rename(columns={"quantity": "installed_quantity"})
 
         # รวมข้อมูลและคำนวณ % ความคืบหน้า
         df_merge = pd.merge(planned, installed, on="element", how="left")
         df_merge["installed_quantity"] = df_merge["installed_quantity"].fillna(0)
+        df_merge["remaining_quantity"] = df_merge["planned_quantity"] - df_merge["installed_quantity"]
         df_merge["progress_percent"] = (df_merge["installed_quantity"] / df_merge["planned_quantity"] * 100).round(2)
+        return df_merge
+
+#===Panels==========================
+
+# แต่ละ panel เป็น fragment ที่ rerun และดึงข้อมูลของตัวเองได้โดยไม่กระทบ panel อื่น
+REFRESH_INTERVALS = {
+    "hauling": 30,
+    "stock": 30,
+    "usage_length": 60,
+    "element_progress": 120,
+}
+
+def refresh_trigger(panel: str, state=None) -> str:
+    """
+    Tell why a panel is running: "page" for a full run of the page, "user" when a widget of the panel changed,
+    and "auto" for a background refresh from 'run_every'.
+    """
+    # show_charts นับรอบการรันทั้งหน้า fragment ที่ rerun เองจะเห็นเลขรอบเดิม
+    page_run = st.session_state.get("dashboard_run", 0)
+    last = st.session_state.get(f"{panel}_last_run")
+    st.session_state[f"{panel}_last_run"] = (page_run, state)
+    if last is None or last[0] != page_run:
+        return "page"
+    return "auto" if last[1] == state else "user"
+
+def traced_panel(panel: str, widget_key: str = None):
+    """
+    Run the panel inside a 'dashboard.<panel>' span tagged with its trigger, so the Latency page can leave
+    background refreshes out of the percentiles.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper():
+            state = st.session_state.get(widget_key) if widget_key else None
+            with span(f"dashboard.{panel}", trigger=refresh_trigger(panel, state)):
+                return func()
+        return wrapper
+    return decorator
+
+@st.fragment(run_every=REFRESH_INTERVALS["hauling"])
+@traced_panel("hauling", widget_key="hauling_date_range")
+def hauling_panel():
+    df = case_data()
+    # ยังไม่มีวันที่ให้เลือก จึงสร้าง date_input ไม่ได้
+    if df["datetime"].isna().all():
+        st.info("No records yet. Hauling data will show here once a record is collected.")
+        return
+    date_range = date_range_input(df, key="hauling_date_range")
+    hauling_group = hauling_summary(df, date_range)
+
+    barchart = alt.Chart(hauling_group).mark_bar().encode(
+        x=alt.X("quantity:Q", title="Quantity"),
+        y=alt.Y("dimension:N", title="Dimension", sort='-x'),
+        tooltip=["dimension", "quantity"]
+    ).properties(
+        title="Hauling Flow"
+    )
+    st.altair_chart(barchart, use_container_width=True)
+
+@st.fragment(run_every=REFRESH_INTERVALS["stock"])
+@traced_panel("stock", widget_key="stock_date_range")
+def stock_panel():
+    df = case_data()
+    # ยังไม่มีวันที่ให้เลือก จึงสร้าง date_input ไม่ได้
+    if df["datetime"].isna().all():
+        st.info("No records yet. Stock data will show here once a record is collected.")
+        return
+    date_range = date_range_input(df, key="stock_date_range")
+    df_final = stock_net_flow(df)
+
+    # cumulative คำนวณจากประวัติทั้งหมดก่อน แล้วจึงตัดช่วงเวลาและลดจำนวนจุด
+    df_chart = downsample(net_in_range(df_final, date_range), x="datetime", y="net", by="dimension")
+
+    # แบ่งเป็น 2 คอลัมน์: col1 = กราฟ, col2 = metric
+    col1, col2 = st.columns([3, 1])
+
+    with col1.container(border=True):
+        chart = alt.Chart(df_chart).mark_line().encode(
+            x=alt.X("datetime:T", title="Datetime"),
+            y=alt.Y("net:Q", title="Net Quantity", scale=alt.Scale(zero=True)),
+            color=alt.Color("dimension:N", title="Dimension"),
+            tooltip=[
+                alt.Tooltip("datetime:T", title="Datetime", format="%Y-%m-%d %H:%M:%S"),
+                alt.Tooltip("dimension:N", title="Dimension"),
+                alt.Tooltip("net:Q", title="Net Quantity"),
+            ]
+        ).properties(
+            title="Net Quantity Flow"
+        )
+        st.altair_chart(chart, use_container_width=True)
+
+    with col2:
+        st.markdown("**Net Quantity by Dimension**")
+        latest_nets = df_final.groupby("dimension", observed=True).tail(1)
+
+        for _, row in latest_nets.iterrows():
+            dim = row["dimension"]
+            net = int(row["net"])
+            st.metric(label=f"Dimension **:green-background[{dim}]** mm.", value=f"{net:,} ea.", border=True)
+
+@st.fragment(run_every=REFRESH_INTERVALS["usage_length"])
+@traced_panel("usage_length")
+def usage_length_panel():
+    st.markdown("##### **Length usage by Dimension (m.)**")
+
+    df_final = length_usage(case_data(), rooflist_data())
+    val_planner = df_final.loc["RoofList"]
+    val_stockout = df_final.loc["Stock Out"]
+    val_usage = df_final.loc["Usage"]
+
+    # เปลี่ยนชื่อแถวให้อ่านง่าย แล้วแสดงตาราง
+    st.dataframe(df_final.rename(index={
+        "Stock Out": "⬇️ Length of steel from Stock Out",
+        "Usage": "🏗️ Length of steel from Installed",
+        "RoofList": "📋 Length of steel from Planner"
+    }).style.format("{:,.2f}"))
+
+    for col in df_final.columns:
+        # คำนวณ % เทียบ stock out
+        progress_stockout = min(val_usage[col] / abs(val_stockout[col]), 1.0) if val_stockout[col] != 0 else 0.0
+        lre_so_u = val_stockout[col] - val_usage[col]
+
+        st.markdown(f"**:green-background[Steel Dimension {col} mm.]**")
+
+        textcol2 = f"Steel Used: **{val_usage[col]:.2f} m.** | Remaining: **{lre_so_u:.2f} m.**"
+        st.progress(progress_stockout, text=textcol2)
+
+@st.fragment(run_every=REFRESH_INTERVALS["element_progress"])
+@traced_panel("element_progress")
+def element_progress_panel():
+    st.markdown("##### **Steel Usage by Structural Element**")
+
+    df_merge = element_progress(case_data(), rooflist_data())
+    df_merge["label"] = df_merge["element"].astype(str) + " (" + df_merge["progress_percent"].map("{:.2f}%".format) + ")"
+
+    # Pie Chart ทุก element อยู่ใน spec เดียว แบ่งเป็น facet แถวละ 4
+    pie_df = df_merge.melt(
+        id_vars="label",
+        value_vars=["installed_quantity", "remaining_quantity"],
+        var_name="status",
+        value_name="value",
+    )
+    pie_df["status"] = pie_df["status"].map({"installed_quantity": "Installed", "remaining_quantity": "Remaining"})
+
+    pie_chart = alt.Chart(pie_df).mark_arc(innerRadius=40).encode(
+        theta=alt.Theta(field="value", type="quantitative"),
+        color=alt.Color(field="status", type="nominal",
+                        scale=alt.Scale(domain=["Installed", "Remaining"], range=["green", "lightgray"])),
+        tooltip=["status:N", "value:Q"]
+    ).properties(
+        width=220,
+        height=220,
+    ).facet(
+        facet=alt.Facet("label:N", title=None, sort=df_merge["label"].tolist()),
+        columns=4,
+    )
+    st.altair_chart(pie_chart, use_container_width=False)
+
+def show_charts():
+    st.session_state["dashboard_run"] = st.session_state.get("dashboard_run", 0) + 1
+
+    with st.expander("**🚛 Hauling Process**", expanded=True):
+        hauling_panel()
 
-        # แสดง Pie Charts
-        for i in range(0, len(df_merge), 4):
-            cols = st.columns(4)
-            for j in range(4):
-                if i + j < len(df_merge):
-                    row = df_merge.iloc[i + j]
-                    element = row["element"]
-                    installed = row["installed_quantity"]
-                    planned = row["planned_quantity"]
-                    remaining = planned - installed
-                    percent = row["progress_percent"]
-
-                    pie_df = pd.DataFrame({
-                        "status": ["Installed", "Remaining"],
-                        "value": [installed, remaining]
-                    })
-
-                    pie_chart = alt.Chart(pie_df).mark_arc(innerRadius=40).encode(
-                        theta=alt.Theta(field="value", type="quantitative"),
-                        color=alt.Color(field="status", type="nominal",
-                                        scale=alt.Scale(domain=["Installed", "Remaining"], range=["green", "lightgray"])),
-                        tooltip=["status:N", "value:Q"]
-                    ).properties(
-                        width=220,
-                        height=220,
-                        title=f"{element} ({percent:.2f}%)"
-                    )
-
-                    with cols[j]:
-                        st.altair_chart(pie_chart, use_container_width=False)
+    with st.expander("**📦 Stock Process**", expanded=True):
+        stock_panel()
 
+    with st.expander("**🏗️ Construction Usage Process**", expanded=True):
+        usage_length_panel()
 
+        st.divider() # เพิ่มเส้นแบ่งเพื่อความสวยงาม
 
+        element_progress_panel()
@@ -0,0 +1,78 @@
+import os
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from st_visiualization import lttb, downsample, in_date_range, net_in_range
+
+def series(dimension: str, points: int, start="2025-01-01", freq: str = "h", values=None) -> pd.DataFrame:
+    return pd.DataFrame({
+        "dimension": dimension,
+        "datetime": pd.date_range(start, periods=points, freq=freq),
+        "net": np.arange(points) if values is None else values,
+    })
+
+def test_lttb_keeps_peaks_and_ends():
+    y = np.zeros(1000)
+    y[[137, 512, 880]] = [50, -40, 30]
+    keep = lttb(np.arange(1000.0), y, 50)
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert {137, 512, 880} <= set(keep.tolist())
+
+def test_lttb_below_three_points():
+    x, y = np.arange(10.0), np.arange(10.0)
+    assert lttb(x, y, 2).tolist() == [0, 9]
+    assert lttb(x, y, 1).tolist() == [9]
+    assert lttb(x, y, 0).tolist() == []
+
+def test_downsample_keeps_peak():
+    values = np.zeros(5000)
+    values[3210] = 999
+    df = downsample(series("50x50", 5000, values=values), x="datetime", y="net", by="dimension", max_points=300)
+    assert len(df) <= 300
+    assert df["net"].max() == 999
+
+def test_downsample_cap_with_more_series_than_budget():
+    # 600 series ได้งบ series ละ 2 จุด: เหลือจุดแรกและจุดสุดท้ายของทุก series
+    df = pd.concat([series(f"d{i}", 5) for i in range(600)], ignore_index=True)
+    out = downsample(df, x="datetime", y="net", by="dimension", max_points=1500)
+    assert len(out) <= 1500
+    assert out["dimension"].nunique() == 600
+    assert (out.groupby("dimension")["net"].agg(["min", "max"]).values == [0, 4]).all()
+
+    # series มากกว่างบจุด: เหลือจุดล่าสุดของ series ที่เคลื่อนไหวล่าสุดเท่านั้น
+    df = pd.concat([series(f"d{i}", 2, start=pd.Timestamp("2025-01-01") + pd.Timedelta(minutes=i), freq="D") for i in range(2000)], ignore_index=True)
+    out = downsample(df, x="datetime", y="net", by="dimension", max_points=1500)
+    assert len(out) == 1500
+    assert set(out["dimension"]) == {f"d{i}" for i in range(500, 2000)}
+
+def test_idle_dimension_stays_flat_in_range():
+    df_net = pd.concat([
+        series("active", 60, freq="D"),
+        series("idle", 3, freq="D", values=[5, 7, 4]),
+    ], ignore_index=True)
+    df_range = net_in_range(df_net, (dt.date(2025, 2, 1), dt.date(2025, 2, 10)))
+
+    idle = df_range[df_range["dimension"] == "idle"]
+    assert idle["net"].tolist() == [4, 4]
+    assert idle["datetime"].tolist() == [pd.Timestamp("2025-02-01"), pd.Timestamp("2025-02-10 23:59:59")]
+
+    active = df_range[df_range["dimension"] == "active"]
+    assert active["datetime"].min() == pd.Timestamp("2025-02-01")
+    assert active["net"].iloc[-1] == 40
+
+def test_single_date_selection():
+    # date_input คืนค่าวันเดียวระหว่างที่ผู้ใช้ยังเลือกช่วงไม่เสร็จ
+    df_net = series("50x50", 72)
+    day = (dt.date(2025, 1, 2),)
+    assert in_date_range(df_net["datetime"], day).sum() == 24
+
+    df_range = net_in_range(df_net, day)
+    assert df_range["datetime"].min() == pd.Timestamp("2025-01-02")
+    assert df_range["datetime"].max() == pd.Timestamp("2025-01-02 23:59:59")
+    assert df_range["net"].tolist()[0] == 24 and df_range["net"].tolist()[-1] == 47
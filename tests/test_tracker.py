@@ -0,0 +1,59 @@
+import numpy as np
+
+from tools1 import SectionTracker
+
+SIZE = 40
+SPACING = 48
+FRAME = (1280, 720)
+
+def row(sections: int, shift: float = 0.0, y: float = 100.0, jitter: float = 0.0, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    x = 100 + np.arange(sections) * SPACING + shift + rng.normal(0, jitter, sections)
+    return np.column_stack([x, np.full(sections, y), x + SIZE, np.full(sections, y + SIZE)])
+
+def window(sections: int, offset: float, width: float) -> np.ndarray:
+    # ภาพจากกล้องที่แพนผ่านแถวเหล็กยาว เห็นเฉพาะท่อนที่อยู่ในกรอบ
+    boxes = row(sections, shift=-offset - 100)
+    return boxes[(boxes[:, 0] >= 0) & (boxes[:, 2] <= width)]
+
+def test_static_row_keeps_ids():
+    tracker = SectionTracker()
+    first = tracker.update(row(10), FRAME)
+    for frame in range(1, 6):
+        assert tracker.update(row(10, jitter=2, seed=frame), FRAME) == first
+    assert tracker.count == 10
+
+def test_panning_row_is_counted_once():
+    for step in (25, 50):
+        tracker = SectionTracker()
+        first = tracker.update(row(10), FRAME)
+        for frame in range(1, 8):
+            assert tracker.update(row(10, shift=step * frame, jitter=1, seed=frame), FRAME) == first
+        assert tracker.count == 10
+
+def test_pan_across_long_row_counts_every_section():
+    tracker = SectionTracker()
+    for frame in range(60):
+        tracker.update(window(30, offset=20 * frame, width=320), (320, 240))
+    assert tracker.count == 30
+
+def test_missed_detections_do_not_add_sections():
+    tracker = SectionTracker()
+    rng = np.random.default_rng(1)
+    for frame in range(60):
+        boxes = window(30, offset=20 * frame, width=320)
+        tracker.update(boxes[rng.random(len(boxes)) >= 0.05], (320, 240))
+    assert tracker.count == 30
+
+def test_single_appearance_in_first_and_last_frame_is_counted():
+    tracker = SectionTracker()
+    tracker.update(row(1), FRAME)
+    tracker.update(row(1, y=400), FRAME)
+    assert tracker.count == 2
+
+def test_single_appearance_in_middle_frame_is_dropped():
+    tracker = SectionTracker()
+    tracker.update(row(5), FRAME)
+    tracker.update(np.vstack([row(5), row(1, y=400)]), FRAME)
+    tracker.update(row(5), FRAME)
+    assert tracker.count == 5
@@ -0,0 +1,53 @@
+import os
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+import datetime as dt
+
+import pandas as pd
+
+from st_visiualization import CASE_SCHEMA, _typed_frame, in_date_range
+
+# แถวจาก Supabase ที่ไม่มีคอลัมน์ description/element และพิมพ์ process/flow ไม่สม่ำเสมอ
+ROWS = [
+    {"datetime": "2025-01-01T10:00:00+07:00", "process": " Stock ", "flow": "In ", "family": "SHS", "dimension": "50x50", "length": "6", "quantity": 3},
+    {"datetime": "2025-01-02T08:30:00.5+07:00", "process": "HAULING", "flow": None, "family": "RHS", "dimension": "100x50", "length": 6.0, "quantity": "-2"},
+    {"datetime": "2025-01-03T00:00:00+07:00", "process": "stock", "flow": "OUT", "family": "SHS", "dimension": " 50x50", "length": None, "quantity": None},
+]
+
+def test_typed_frame_follows_schema():
+    df = _typed_frame(ROWS, CASE_SCHEMA)
+    assert list(df.columns) == list(CASE_SCHEMA)
+    assert str(df["datetime"].dtype) == "datetime64[ns, UTC+07:00]"
+    for column in ("process", "flow", "family", "dimension", "element"):
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+    assert df["length"].dtype == "float64"
+    assert df["quantity"].dtype == "int64"
+    assert df["description"].dtype == "string[pyarrow]"
+
+def test_categories_are_cleaned_and_remapped():
+    df = _typed_frame(ROWS, CASE_SCHEMA)
+    # ค่าที่ต่างกันแค่ช่องว่างหรือตัวพิมพ์ถูกรวมเป็น category เดียว และรหัสของแต่ละแถวชี้ไปที่ค่าที่ทำความสะอาดแล้ว
+    assert df["process"].tolist() == ["stock", "hauling", "stock"]
+    assert sorted(df["process"].cat.categories) == ["hauling", "stock"]
+    assert df["flow"].tolist() == ["in", "-", "out"]
+    assert df["dimension"].tolist() == ["50x50", "100x50", "50x50"]
+    assert df["family"].tolist() == ["SHS", "RHS", "SHS"]
+
+def test_missing_values_and_columns_are_filled():
+    df = _typed_frame(ROWS, CASE_SCHEMA)
+    assert df["element"].tolist() == ["-", "-", "-"]
+    assert df["description"].tolist() == ["-", "-", "-"]
+    assert df["length"].tolist() == [6.0, 6.0, 0.0]
+    assert df["quantity"].tolist() == [3, -2, 0]
+
+def test_tz_aware_datetimes_filter_by_local_date():
+    df = _typed_frame(ROWS, CASE_SCHEMA)
+    assert df["datetime"].iloc[1] == pd.Timestamp("2025-01-02 08:30:00.5", tz="UTC+07:00")
+    assert in_date_range(df["datetime"], (dt.date(2025, 1, 2), dt.date(2025, 1, 3))).tolist() == [False, True, True]
+
+def test_empty_table_keeps_schema():
+    df = _typed_frame([], CASE_SCHEMA)
+    assert df.empty
+    assert list(df.columns) == list(CASE_SCHEMA)
+    assert df["description"].dtype == "string[pyarrow]"
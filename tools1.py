@@ -2,6 +2,7 @@ from dotenv import load_dotenv
 load_dotenv()
 import os
 from schema import DateTimeForm, FamilyForm, FlowForm, DimForm, ProcessForm, RoofForm
+from tracing import span
 
 #Object Detection Tool with YOLOv11
 
@@ -14,6 +15,39 @@ import base64
 
 YOLO_URL_API = os.getenv("YOLO_URL_API")
 YOLO_MODEL_API = os.getenv("YOLO_MODEL_API")
+YOLO_PREDICT_URL = os.getenv("YOLO_PREDICT_URL", "https://predict.ultralytics.com")
+
+def _encode_image(image: Image.Image) -> BytesIO:
+    """
+    Encode one RGB image as the JPEG payload sent to the predict API.
+    """
+    with span("image.encode", width=image.width, height=image.height) as s:
+        image_bytes = BytesIO()
+        image.save(image_bytes, format="JPEG")
+        s.set(payload_bytes=image_bytes.tell())
+        image_bytes.seek(0)
+    return image_bytes
+
+def _predict(image: Image.Image, session=requests) -> list:
+    """
+    Send one RGB image to the Ultralytics predict API and return the list of detections.
+    """
+    image_bytes = _encode_image(image)
+
+    headers = {"x-api-key": YOLO_URL_API}
+    data = {"model": YOLO_MODEL_API, "imgsz": 640, "conf": 0.25, "iou": 0.45}
+    files = {"file": ("image.jpg", image_bytes, "image/jpeg")}
+
+    with span("http.predict", url=YOLO_PREDICT_URL) as s:
+        response = session.post(YOLO_PREDICT_URL, headers=headers, data=data, files=files)
+        s.set(status_code=response.status_code, response_bytes=len(response.content))
+        response.raise_for_status()
+        result_json = response.json()
+
+    results = []
+    for img_data in result_json.get("images", []):
+        results.extend(img_data.get("results", []))
+    return results
 
 def objectdetection(image_path: str):    
     """
@@ -41,25 +75,12 @@ def objectdetection(image_path: str):
         return None, "❌ Image path not found."
 
     image = Image.open(image_path).convert("RGB")
-    image_bytes = BytesIO()
-    image.save(image_bytes, format="JPEG")
-    image_bytes.seek(0)
-
-    headers = {"x-api-key": YOLO_URL_API}
-    data = {"model": YOLO_MODEL_API, "imgsz": 640, "conf": 0.25, "iou": 0.45}
-    files = {"file": ("image.jpg", image_bytes, "image/jpeg")}
 
     try:
-        response = requests.post("https://predict.ultralytics.com", headers=headers, data=data, files=files)
-        response.raise_for_status()
-        result_json = response.json()
+        results = _predict(image)
     except Exception as e:
         return None, str(e)
 
-    results = []
-    for img_data in result_json.get("images", []):
-        results.extend(img_data.get("results", []))
-
     draw = ImageDraw.Draw(image)
     for obj in results:
         box = obj.get("box", {})
@@ -68,6 +89,278 @@ def objectdetection(image_path: str):
 
     return image, len(results)
 
+#Video Detection Tool with YOLOv11 and IoU Tracking
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+VIDEO_FRAME_STRIDE = int(os.getenv("VIDEO_FRAME_STRIDE", 15))
+VIDEO_BATCH_SIZE = int(os.getenv("VIDEO_BATCH_SIZE", 8))
+VIDEO_MAX_SIDE = 640
+
+def _sample_frames(video_path: str, stride: int):
+    """
+    Yield every 'stride'-th frame of the video as a RGB image resized to the model input size.
+    Skipped frames are only grabbed, never converted, so long videos stay cheap to read.
+    """
+    import cv2
+
+    capture = cv2.VideoCapture(video_path)
+    index = 0
+    try:
+        while capture.grab():
+            if index % stride == 0:
+                ok, frame = capture.retrieve()
+                if ok:
+                    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                    image.thumbnail((VIDEO_MAX_SIDE, VIDEO_MAX_SIDE))
+                    yield index, image
+            index += 1
+    finally:
+        capture.release()
+
+def _box_array(results: list) -> np.ndarray:
+    boxes = [
+        [obj.get("box", {}).get(k, 0) for k in ("x1", "y1", "x2", "y2")]
+        for obj in results
+    ]
+    return np.asarray(boxes, dtype=float).reshape(-1, 4)
+
+def _iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+def _centers(boxes: np.ndarray) -> np.ndarray:
+    return (boxes[:, :2] + boxes[:, 2:]) / 2
+
+class SectionTracker:
+    """
+    Lightweight IoU tracker that links detections across sampled frames, so each physical section is counted once.
+
+    Sections in a stack or on a truck move together, so the tracker keeps one motion per sampled frame for the whole scene.
+    Before IoU matching the tracks are moved by that motion, and the remaining offset is voted from the distances between
+    tracks and detections, so a pan larger than the section size still matches each section to itself.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_age: int = 2, min_hits: int = 2):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.frames = 0
+        self.next_id = 0
+        self.motion = np.zeros(2)
+        self.boxes = np.empty((0, 4))
+        self.ids = []
+        self.ages = []
+        self.seen = {}
+
+    def _misfit(self, predicted: np.ndarray, boxes: np.ndarray, offset: np.ndarray, frame_size) -> int:
+        """
+        Count the sections that would vanish or appear in the middle of the frame if the tracks moved by 'offset'.
+        Sections only enter or leave the view at its edges, so a wrong offset leaves unmatched boxes inside the frame,
+        either where they were predicted or where the offset puts them.
+        """
+        shift = np.tile(offset, 2)
+        overlap = _iou_matrix(boxes, predicted + shift) >= self.iou_threshold
+        lost, new = ~overlap.any(axis=0), ~overlap.any(axis=1)
+        if frame_size is None:
+            return int(lost.sum() + new.sum())
+
+        width, height = frame_size
+        # ท่อนที่อยู่ห่างขอบภาพไม่ถึงครึ่งท่อน อาจกำลังเข้าหรือออกจากภาพ จึงไม่นับว่าอยู่กลางภาพ
+        def inside(b):
+            margin = (b[:, 2:] - b[:, :2]) / 2
+            return (b[:, :2] >= margin).all(axis=1) & (b[:, 2:] <= np.array([width, height]) - margin).all(axis=1)
+
+        previous = boxes - np.tile(self.motion, 2)
+        return int(
+            (lost & (inside(predicted) | inside(predicted + shift))).sum()
+            + (new & (inside(previous) | inside(previous - shift))).sum()
+        )
+
+    def _offset(self, predicted: np.ndarray, boxes: np.ndarray, frame_size) -> np.ndarray:
+        """
+        Vote for the offsets that line up predicted tracks with detections, and keep the one that best explains the frame.
+        """
+        diffs = (_centers(boxes)[:, None, :] - _centers(predicted)[None, :, :]).reshape(-1, 2)
+        sizes = np.minimum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+        cell = max(float(np.median(sizes)) / 4, 1.0)
+
+        # นับคะแนนของแต่ละช่อง offset รวมช่องข้างเคียง เพื่อไม่ให้ offset ที่อยู่ตรงรอยต่อของช่องถูกแบ่งคะแนน
+        quantized = np.round(diffs / cell).astype(np.int64)
+        radius = int(np.abs(quantized).max()) + 2
+        width = 2 * radius + 1
+        keys, counts = np.unique(quantized[:, 0] * width + quantized[:, 1], return_counts=True)
+        votes = np.zeros(len(keys), dtype=np.int64)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                neighbours = keys + dx * width + dy
+                pos = np.clip(np.searchsorted(keys, neighbours), 0, len(keys) - 1)
+                votes += np.where(keys[pos] == neighbours, counts[pos], 0)
+        cells = np.column_stack(np.divmod(keys + radius, width)) - [0, radius]
+
+        # offset ที่ได้คะแนนไม่ถึงครึ่งของอันดับหนึ่งอธิบายภาพได้แย่กว่าเสมอ จึงไม่ต้องนำมาเทียบ
+        strong = np.flatnonzero(votes >= max(votes.max() // 2, 2))
+        candidates, peaks = [], []
+        for k in strong[np.argsort(-votes[strong], kind="stable")]:
+            if len(candidates) == 4:
+                break
+            if any(np.abs(cells[k] - p).max() <= 2 for p in peaks):
+                continue
+            peaks.append(cells[k])
+            near = np.abs(diffs - cells[k] * cell).max(axis=1) <= 1.5 * cell
+            candidates.append(np.median(diffs[near], axis=0))
+        if not candidates:
+            return np.zeros(2)
+
+        # A row of sections looks the same when it moves by one section, so several offsets can match most boxes.
+        # Missed detections leave a few boxes unexplained whatever the offset, so the smallest change from the predicted
+        # motion is kept unless another offset explains clearly more of the frame.
+        misfits = [self._misfit(predicted, boxes, c, frame_size) for c in candidates]
+        tolerance = max(len(boxes) // 10, 1)
+        return min(
+            (c for c, m in zip(candidates, misfits) if m <= min(misfits) + tolerance),
+            key=lambda c: float(np.abs(c).sum()),
+        )
+
+    def update(self, boxes: np.ndarray, frame_size: tuple = None) -> list:
+        """
+        Match the boxes of one frame to the live tracks and return the track id of each box.
+        'frame_size' is the (width, height) of the frame. Without it every unmatched box counts against an offset,
+        so a view panning along a stack longer than the frame can be mistaken for a move to the neighbouring section.
+        """
+        self.frames += 1
+        assigned = [None] * len(boxes)
+        matched_tracks = set()
+
+        if len(boxes) and len(self.ids):
+            # เลื่อน track ตามการเคลื่อนที่ของทั้งภาพ ตามจำนวน frame ที่ track นั้นหายไป
+            gaps = np.asarray(self.ages, dtype=float)[:, None] + 1
+            predicted = self.boxes + np.tile(self.motion * gaps, 2)
+            predicted = predicted + np.tile(self._offset(predicted, boxes, frame_size), 2)
+
+            iou = _iou_matrix(boxes, predicted)
+            moved = (_centers(boxes)[:, None, :] - _centers(self.boxes)[None, :, :]) / gaps[None, :, :]
+            displacements = []
+            # Greedy matching on the highest IoU first
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                i, j = divmod(int(flat), iou.shape[1])
+                if iou[i, j] < self.iou_threshold:
+                    break
+                if assigned[i] is not None or j in matched_tracks:
+                    continue
+                assigned[i] = self.ids[j]
+                matched_tracks.add(j)
+                displacements.append(moved[i, j])
+                self.boxes[j] = boxes[i]
+                self.ages[j] = 0
+                seen = self.seen[self.ids[j]]
+                seen[1], seen[2] = self.frames, seen[2] + 1
+
+            if displacements:
+                self.motion = np.median(displacements, axis=0)
+
+        keep = [j for j in range(len(self.ids)) if j in matched_tracks or self.ages[j] + 1 <= self.max_age]
+        self.ages = [0 if j in matched_tracks else self.ages[j] + 1 for j in keep]
+        self.boxes = self.boxes[keep]
+        self.ids = [self.ids[j] for j in keep]
+
+        for i, box in enumerate(boxes):
+            if assigned[i] is None:
+                assigned[i] = self.next_id
+                self.seen[self.next_id] = [self.frames, self.frames, 1]
+                self.next_id += 1
+                self.boxes = np.vstack([self.boxes, box])
+                self.ids.append(assigned[i])
+                self.ages.append(0)
+
+        return assigned
+
+    @property
+    def count(self) -> int:
+        """
+        Number of distinct sections seen in at least 'min_hits' sampled frames.
+        Sections seen in the first or the last sampled frame are always counted, since they may only be entering or leaving the view.
+        """
+        return sum(
+            1 for first, last, hits in self.seen.values()
+            if hits >= self.min_hits or first == 1 or last == self.frames
+        )
+
+def videodetection(video_path: str, stride: int = VIDEO_FRAME_STRIDE):
+    """
+
+        This tool is designed to detect and count objects in a video provided by the user, such as a long stack 
+    of sections filmed from end to end or a truck passing by.
+        Frames are sampled every 'stride' frames, sent for detection in batches, and the detections are linked 
+    across frames by a tracker, so each physical section is counted only once.
+
+        The primary purpose of this tool is to count the end-face (cross-sectional view) of steel hollow sections, 
+    such as Square Hollow Sections (SHS) or Rectangular Hollow Sections (RHS), when a single image cannot capture all of them.
+    The count is intended to be passed into the 'quantity' parameter in the 'datacollection()' function.
+
+        Step of using this tool:
+            step 1: Upload a video of the steel hollow sections (SHS/RHS).
+            step 2: The tool samples the frames, detects the sections in each frame and tracks them between frames.
+            step 3: The tool will return the number of distinct sections and the frame with the most detections,
+                    drawn with the bounding boxes and the track id of each section.
+            step 4: 4.1) Send the number of sections detected to the 'quantity' parameter in the 'datacollection()'.
+                    4.2) Send the image of sections detected to the streamlit app for display.
+
+    """
+
+    if not os.path.exists(video_path):
+        return None, "❌ Video path not found."
+
+    stride = max(int(stride), 1)
+    tracker = SectionTracker()
+    best_frame, best_boxes, best_ids = None, np.empty((0, 4)), []
+
+    def track_batch(batch, executor, session):
+        nonlocal best_frame, best_boxes, best_ids
+        # Frames of a batch are predicted concurrently but tracked in order.
+        # Worker threads do not inherit contextvars, so each task runs in a copy of this context to keep its spans in the turn
+        futures = [executor.submit(contextvars.copy_context().run, _predict, frame, session) for _, frame in batch]
+        for (_, frame), future in zip(batch, futures):
+            boxes = _box_array(future.result())
+            ids = tracker.update(boxes, frame.size)
+            if best_frame is None or len(boxes) > len(best_boxes):
+                best_frame, best_boxes, best_ids = frame, boxes, ids
+
+    try:
+        # span ของทั้งวิดีโอเป็น parent ของ span รายเฟรม แม้ผู้เรียกจะไม่ได้เปิด span ไว้ก่อน
+        with span("tool.videodetection", stride=stride) as s, requests.Session() as session, ThreadPoolExecutor(max_workers=VIDEO_BATCH_SIZE) as executor:
+            batch, frames = [], 0
+            for item in _sample_frames(video_path, stride):
+                batch.append(item)
+                frames += 1
+                if len(batch) == VIDEO_BATCH_SIZE:
+                    track_batch(batch, executor, session)
+                    batch = []
+            if batch:
+                track_batch(batch, executor, session)
+            s.set(frames=frames, sections=tracker.count)
+    except Exception as e:
+        return None, str(e)
+
+    if best_frame is None:
+        return None, "❌ No frames could be read from the video."
+
+    draw = ImageDraw.Draw(best_frame)
+    for (x1, y1, x2, y2), track_id in zip(best_boxes, best_ids):
+        draw.rectangle([x1, y1, x2, y2], outline="lime", width=2)
+        draw.text((x1 + 3, y1 + 2), str(track_id), fill="lime")
+
+    return best_frame, tracker.count
+
 #Data Collection Tool with Supabase
 
 from typing import Dict
@@ -158,7 +451,8 @@ def datacollection(
     supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
     table_name = "case_database"
     
-    supabase.table(table_name).insert(data).execute()
+    with span("supabase.insert", table=table_name, payload_bytes=len(str(data).encode())):
+        supabase.table(table_name).insert(data).execute()
     print("\n«  Data Collected!  »\n")
 
     return data
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# Spans are appended as one flat JSON object per line. The field names follow OpenTelemetry, but the records are not OTLP/JSON.
+# Set TRACE_PATH to an empty string to turn tracing off.
+TRACE_PATH = os.getenv("TRACE_PATH", "traces.jsonl")
+# When the file reaches TRACE_MAX_BYTES it is moved to TRACE_PATH + ".1", so at most two files are kept and the Latency page reads a bounded one.
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", 10_000_000))
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_write_lock = threading.Lock()
+
+def _new_id(length: int) -> str:
+    return uuid.uuid4().hex[:length]
+
+class Span:
+    """
+    One timed stage of a turn, e.g. a graph node, a LLM call, a tool call or a HTTP request.
+    """
+
+    def __init__(self, name: str, parent: "Span" = None, **attributes):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else _new_id(32)
+        self.span_id = _new_id(16)
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.status = "OK"
+        self.start_time = time.time_ns()
+        self._start = time.perf_counter_ns()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error: BaseException = None):
+        duration = time.perf_counter_ns() - self._start
+        if error is not None:
+            self.status = "ERROR"
+            self.attributes["error"] = repr(error)[:500]
+        export({
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_time,
+            "endTimeUnixNano": self.start_time + duration,
+            "durationMs": duration / 1e6,
+            "status": self.status,
+            "attributes": self.attributes,
+        })
+
+def export(record: dict):
+    if not TRACE_PATH:
+        return
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _write_lock:
+        with open(TRACE_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            full = f.tell() >= TRACE_MAX_BYTES
+        if full:
+            os.replace(TRACE_PATH, TRACE_PATH + ".1")
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time the enclosed block as a child of the current span.
+    """
+    current = Span(name, parent=_current_span.get(), **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(error=e)
+        raise
+    else:
+        current.end()
+    finally:
+        _current_span.reset(token)
+
+#===LangChain / LangGraph Callbacks==========================
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.errors import GraphBubbleUp
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Turn the callbacks of a graph invocation into spans for each graph node, LLM call and tool call.
+    """
+
+    def __init__(self):
+        self.root = _current_span.get()
+        self.spans = {}
+        self.parents = {}
+        self.tokens = {}
+
+    def _parent(self, parent_run_id):
+        # Chains that are not graph nodes are not recorded, so walk up to the closest recorded run
+        while parent_run_id is not None and parent_run_id not in self.spans:
+            parent_run_id = self.parents.get(parent_run_id)
+        return self.spans.get(parent_run_id, self.root)
+
+    @staticmethod
+    def _agent(metadata) -> str:
+        # The first part of the checkpoint namespace is the node of the outer graph, i.e. the supervisor or one of the agents
+        namespace = (metadata or {}).get("langgraph_checkpoint_ns") or ""
+        return namespace.split("|")[0].split(":")[0] or "-"
+
+    def _start(self, name, run_id, parent_run_id, **attributes):
+        self.parents[run_id] = parent_run_id
+        self.spans[run_id] = Span(name, parent=self._parent(parent_run_id), **attributes)
+
+    def _end(self, run_id, error=None, **attributes):
+        current = self.spans.pop(run_id, None)
+        self.parents.pop(run_id, None)
+        # Handoffs between agents are raised as ParentCommand, which is control flow rather than a failure
+        if isinstance(error, GraphBubbleUp):
+            attributes["bubble_up"] = type(error).__name__
+            error = None
+        if current is not None:
+            current.set(**attributes)
+            current.end(error=error)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        name = kwargs.get("name")
+        if parent_run_id is None:
+            self._start("graph.invoke", run_id, parent_run_id)
+        elif node and node == name and getattr(self._parent(parent_run_id), "name", None) != f"node:{node}":
+            # A compiled agent used as a node reports its own run under the same node name, so it is folded into the outer span
+            self._start(f"node:{node}", run_id, parent_run_id, agent=self._agent(metadata))
+        else:
+            self.parents[run_id] = parent_run_id
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        payload = sum(len(str(m.content)) for batch in messages for m in batch)
+        model = (serialized or {}).get("name") or kwargs.get("name") or "chat_model"
+        self._start(f"llm:{model}", run_id, parent_run_id, agent=self._agent(metadata), prompt_chars=payload)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                for key, value in (getattr(message, "usage_metadata", None) or {}).items():
+                    if isinstance(value, int):
+                        usage[key] = usage.get(key, 0) + value
+        self._end(run_id, **usage)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        tool = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._start(f"tool:{tool}", run_id, parent_run_id, agent=self._agent(metadata), input_bytes=len(str(input_str).encode()))
+        # Sync tools run in the thread that fires this callback, so the spans opened inside the tool nest under it
+        self.tokens[run_id] = _current_span.set(self.spans[run_id])
+
+    def _reset(self, run_id):
+        token = self.tokens.pop(run_id, None)
+        if token is not None:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                pass
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._reset(run_id)
+        self._end(run_id, output_bytes=len(str(output).encode()))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._reset(run_id)
+        self._end(run_id, error=error)